@@ -0,0 +1,169 @@
+from googleapiclient.http import MediaUpload
+
+
+def read_stream(stream, length):
+
+    """
+    Чтение из потока ровно length байт или до его конца.
+
+    Args:
+        stream: Файлоподобный объект с методом read.
+
+        length: Количество байт.
+
+    Returns:
+        Прочитанные байты.
+    """
+
+    parts = []
+    while length > 0:
+        part = stream.read(length)
+        if not part:
+            break
+        parts.append(part)
+        length -= len(part)
+    return b''.join(parts)
+
+
+class StreamingMediaUpload(MediaUpload):
+
+    """
+    Resumable-загрузка на Google Диск из потока, который нельзя перемотать
+    (например, response.raw ответа requests).
+
+    Данные читаются из потока последовательно фрагментами по chunksize,
+    поэтому в памяти находится не больше одного фрагмента, а скачивание
+    файла идет одновременно с его загрузкой.
+    """
+
+
+    def __init__(self, stream, mimetype, chunksize=1024 * 1024, size=None, prefix=b'') -> None:
+
+        """
+        Инициализация загрузки.
+
+        Args:
+            stream: Файлоподобный объект с методом read.
+
+            mimetype: MIME-тип загружаемых данных.
+
+            chunksize: Размер фрагмента resumable-загрузки в байтах.
+
+            size: Размер данных в байтах или None, если он неизвестен.
+
+            prefix: Начало данных, уже прочитанное из stream.
+        """
+
+        super().__init__()
+        self._stream = stream
+        self._mimetype = mimetype
+        self._chunksize = chunksize
+        self._size = size
+        self._prefix = prefix
+        # Последний отданный фрагмент и его смещение: сервер может подтвердить
+        # фрагмент не полностью, и тогда его остаток запрашивается повторно
+        self._chunk = b''
+        self._chunk_begin = 0
+
+
+    def chunksize(self):
+
+        """
+        Размер фрагмента загрузки.
+
+        Returns:
+            Размер фрагмента resumable-загрузки в байтах.
+        """
+
+        return self._chunksize
+
+
+    def mimetype(self):
+
+        """
+        MIME-тип загрузки.
+
+        Returns:
+            MIME-тип загружаемых данных.
+        """
+
+        return self._mimetype
+
+
+    def size(self):
+
+        """
+        Размер данных. Если он неизвестен, googleapiclient определяет конец
+        загрузки по фрагменту короче chunksize.
+
+        Returns:
+            Размер данных в байтах или None.
+        """
+
+        return self._size
+
+
+    def resumable(self):
+
+        """
+        Признак resumable-загрузки.
+
+        Returns:
+            True: поток загружается только resumable-загрузкой.
+        """
+
+        return True
+
+
+    def has_stream(self):
+
+        """
+        Признак доступа к потоку напрямую.
+
+        Returns:
+            False: googleapiclient должен получать данные через getbytes,
+            так как поток нельзя перемотать.
+        """
+
+        return False
+
+
+    def getbytes(self, begin, length):
+
+        """
+        Получение фрагмента данных.
+
+        Args:
+            begin: Смещение начала фрагмента.
+
+            length: Размер фрагмента.
+
+        Returns:
+            Байты фрагмента. Если их меньше length, поток закончился.
+        """
+
+        chunk_end = self._chunk_begin + len(self._chunk)
+        if not self._chunk_begin <= begin <= chunk_end:
+            raise ValueError(f"Нельзя вернуться к смещению {begin}: поток уже прочитан до {chunk_end}")
+        data = self._chunk[begin - self._chunk_begin:][:length]
+        data += self._read(length - len(data))
+        self._chunk = data
+        self._chunk_begin = begin
+        return data
+
+
+    def _read(self, length):
+
+        """
+        Чтение следующих length байт: сначала из prefix, затем из потока.
+
+        Args:
+            length: Количество байт.
+
+        Returns:
+            Прочитанные байты.
+        """
+
+        data = self._prefix[:length]
+        self._prefix = self._prefix[length:]
+        return data + read_stream(self._stream, length - len(data))
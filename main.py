@@ -1,13 +1,102 @@
 import os
 import json
+import asyncio
+import threading
+import aiohttp
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from pprint import pprint
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from tqdm import tqdm
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaInMemoryUpload
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class HttpxTransport:
+
+    """
+    Транспорт для googleapiclient поверх httpx.
+
+    Повторяет интерфейс httplib2.Http.request, поэтому его можно передать
+    в AuthorizedHttp и execute(http=...). Клиент httpx потокобезопасен и,
+    если сервер согласовал HTTP/2, мультиплексирует запросы всех потоков
+    в одном соединении.
+    """
+
+    timeout = None
+    # Как в googleapiclient.http.build_http: 308 - это "Resume Incomplete"
+    # resumable-загрузки, а не редирект, его обрабатывает сам googleapiclient
+    REDIRECT_CODES = (300, 301, 302, 303, 307)
+
+
+    def __init__(self, client) -> None:
+
+        """
+        Инициализация транспорта.
+
+        Args:
+            client: Клиент httpx.Client.
+        """
+
+        self.client = client
+
+
+    @staticmethod
+    def create_client(max_connections=8):
+
+        """
+        Создание клиента httpx с HTTP/2.
+
+        При HTTP/2 все запросы идут через одно соединение. Лимит соединений
+        нужен на случай, когда HTTP/2 не согласован (например, через прокси)
+        и каждому потоку требуется свое HTTP/1.1-соединение.
+
+        Args:
+            max_connections: Максимальное число соединений, по числу потоков загрузки.
+
+        Returns:
+            Клиент httpx.Client или None, если httpx с поддержкой HTTP/2 не установлен.
+        """
+
+        try:
+            import httpx
+            # pool=None: поток ждет свободное соединение без таймаута,
+            # httpx.PoolTimeout googleapiclient не обрабатывает
+            return httpx.Client(http2=True,
+                                timeout=httpx.Timeout(60.0, pool=None),
+                                limits=httpx.Limits(max_connections=max_connections,
+                                                    max_keepalive_connections=max_connections))
+        except ImportError:
+            return None
+
+
+    def request(self, uri, method='GET', body=None, headers=None,
+                redirections=5, connection_type=None):
+
+        """
+        Выполнение запроса в формате httplib2.Http.request.
+        Редиректы выполняются только для GET и HEAD и не для ответа 308.
+
+        Returns:
+            Кортеж (httplib2.Response, содержимое ответа).
+        """
+
+        import httplib2
+
+        response = self.client.request(method, uri, content=body, headers=headers,
+                                       follow_redirects=False)
+        while (method in ('GET', 'HEAD')
+               and response.status_code in self.REDIRECT_CODES
+               and response.next_request is not None
+               and redirections > 0):
+            response = self.client.send(response.next_request)
+            redirections -= 1
+        info = {**response.headers, 'status': str(response.status_code)}
+        return httplib2.Response(info), response.content
 
 
 class VkApiClient:
@@ -15,6 +104,9 @@ class VkApiClient:
     """Класс для работы с VK API."""
 
     API_BASE_URL = 'https://api.vk.com/method/'
+    UPLOAD_CHUNK_SIZE = 1024 * 1024
+    RESUMABLE_UPLOAD_THRESHOLD = 5 * 1024 * 1024
+    __slots__ = ('token', 'photo_type', 'session', '_users_cache')
 
 
     def __init__(self, token, photo_type='z') -> None:
@@ -30,6 +122,16 @@ class VkApiClient:
 
         self.token = token
         self.photo_type = photo_type
+        # Общая сессия переиспользует TCP/TLS-соединения между запросами
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16,
+                              pool_maxsize=16,
+                              max_retries=Retry(total=3,
+                                                backoff_factor=0.3,
+                                                status_forcelist=[429, 500, 502, 503, 504]))
+        self.session.mount('https://', adapter)
+        # Кэш ответов users.get по ключу (токен, ID пользователя)
+        self._users_cache = {}
 
 
     def get_common_params(self):
@@ -47,6 +149,24 @@ class VkApiClient:
         }
 
 
+    def _parse_json(self, response):
+
+        """
+        Разбор JSON-ответа VK API. При наличии orjson используется он,
+        иначе стандартный response.json().
+
+        Args:
+            response: Ответ requests.Response.
+
+        Returns:
+            Разобранный JSON-ответ.
+        """
+
+        if orjson is not None:
+            return orjson.loads(response.content)
+        return response.json()
+
+
     def status_info(self, user_id):
 
         """
@@ -59,15 +179,34 @@ class VkApiClient:
             {"Имя Фамилия": ID пользователя.}
         """
 
-        params = {**self.get_common_params(), 'user_ids': user_id}
-        url = self.API_BASE_URL + 'users.get'
-        response = requests.get(url, params=params).json()
-        first_name = response.get('response', [])[0].get('first_name')
-        last_name = response.get('response', [])[0].get('last_name')
-        user_id_info = response.get('response', [])[0].get('id')
+        user_info = self._users_get(user_id)
+        first_name = user_info.get('first_name')
+        last_name = user_info.get('last_name')
+        user_id_info = user_info.get('id')
         return {f"{first_name} {last_name}": user_id_info}
 
 
+    def _users_get(self, user_id):
+
+        """
+        Запрос users.get к VK API с кэшированием по токену и ID пользователя.
+
+        Args:
+            user_id: ID пользователя VK.
+
+        Returns:
+            Копия словаря с данными пользователя из ответа VK API.
+        """
+
+        key = (self.token, user_id)
+        if key not in self._users_cache:
+            params = {**self.get_common_params(), 'user_ids': user_id}
+            url = self.API_BASE_URL + 'users.get'
+            response = self._parse_json(self.session.get(url, params=params))
+            self._users_cache[key] = response.get('response', [])[0]
+        return dict(self._users_cache[key])
+
+
     def get_status(self, user_id):
 
         """
@@ -83,8 +222,8 @@ class VkApiClient:
         params = self.get_common_params()
         params.update({'user_ids': user_id})
         url = self.API_BASE_URL + 'status.get'
-        response = requests.get(url, params=params)
-        return response.json().get('response', {}).get('text')
+        response = self.session.get(url, params=params)
+        return self._parse_json(response).get('response', {}).get('text')
 
 
     def set_status(self, user_id, new_status):
@@ -103,7 +242,7 @@ class VkApiClient:
         params = self.get_common_params()
         params.update({'user_ids': user_id, 'text': new_status})
         url = self.API_BASE_URL + 'status.set'
-        response = requests.get(url, params=params)
+        response = self.session.get(url, params=params)
         response.raise_for_status()
 
 
@@ -140,13 +279,13 @@ class VkApiClient:
                 'profile' — фотографии профиля.
 
         Returns:
-            Список с кортежами вида (likes, date, url).
+            Список с кортежами вида (likes, date, url, photo_id).
             likes - количество лайков на фотографии;
             date - дата загрузки фотографии;
-            url - URL-адрес фотографии.
+            url - URL-адрес фотографии;
+            photo_id - идентификатор фотографии VK вида owner_id_id.
         """
 
-        profile_photos = []
         params = {**self.get_common_params(),
                   'owner_id': user_id,
                   'album_id': album_id,
@@ -155,16 +294,149 @@ class VkApiClient:
                   'count': count
                   }
         url = self.API_BASE_URL + 'photos.get'
-        response = requests.get(url, params=params)
-        image_list = response.json()['response']['items']
+        response = self.session.get(url, params=params)
+        image_list = self._parse_json(response)['response']['items']
+        return self._filter_photo_sizes(image_list)
+
+
+    def get_profile_photos_batch(self, jobs):
+
+        """
+        Получение фотографий нескольких пользователей или альбомов
+        одним запросом через метод execute VK API.
+
+        Args:
+            jobs: Список кортежей вида (user_id, album_id, count).
+
+        Returns:
+            Список, в котором для каждого задания лежит список кортежей
+            вида (likes, date, url, photo_id), как в get_profile_photos.
+        """
+
+        url = self.API_BASE_URL + 'execute'
+        result = []
+        # execute выполняет не более 25 вызовов API за один запрос
+        for start in range(0, len(jobs), 25):
+            calls = []
+            for user_id, album_id, count in jobs[start:start + 25]:
+                photos_params = {'owner_id': user_id,
+                                 'album_id': album_id,
+                                 'extended': 1,
+                                 'photo_sizes': 1,
+                                 'count': count}
+                calls.append(f"API.photos.get({json.dumps(photos_params)})")
+            params = {**self.get_common_params(),
+                      'code': f"return [{', '.join(calls)}];"}
+            response = self.session.post(url, data=params)
+            response.raise_for_status()
+            for block in self._parse_json(response)['response']:
+                image_list = block['items'] if block else []
+                result.append(self._filter_photo_sizes(image_list))
+        return result
+
+
+    def _filter_photo_sizes(self, image_list):
+
+        """
+        Выбор из ответа photos.get фотографий нужного размера.
+
+        Args:
+            image_list: Список фотографий из ответа photos.get.
+
+        Returns:
+            Список с кортежами вида (likes, date, url, photo_id).
+        """
+
+        profile_photos = []
         for image_info in image_list:
-            for size in image_info['sizes']:
-                if self.photo_type in size['type']:
-                    profile_photo = image_info['likes']['count'], image_info['date'], size['url']
-                    profile_photos.append(profile_photo)
+            sizes_by_type = {size['type']: size for size in image_info['sizes']}
+            size = sizes_by_type.get(self.photo_type)
+            if size is not None:
+                photo_id = f"{image_info['owner_id']}_{image_info['id']}"
+                profile_photo = image_info['likes']['count'], image_info['date'], size['url'], photo_id
+                profile_photos.append(profile_photo)
         return profile_photos
 
-    def save_photos_to_yandex_disk(self, album_id_vk, count_photos=5, album_id='profile'):
+
+    def _make_image_names(self, photos, taken_names=()):
+
+        """
+        Формирование имен файлов для фотографий до начала загрузки.
+
+        Имя файла - количество лайков. Если такое имя уже занято,
+        к нему добавляется дата загрузки фотографии.
+
+        Args:
+            photos: Список с кортежами вида (likes, date, url, photo_id).
+
+            taken_names: Имена файлов, которые уже заняты в хранилище.
+
+        Returns:
+            Список имен файлов в том же порядке, что и photos.
+        """
+
+        image_names = []
+        seen = {name.removesuffix('.jpg') for name in taken_names}
+        for likes, date, _, _ in photos:
+            key = f"{likes}_likes"
+            if key in seen:
+                date = datetime.fromtimestamp(date).strftime('%Y-%m-%d_%H-%M-%S')
+                image_names.append(f"{key}__{date}.jpg")
+            else:
+                image_names.append(f"{key}.jpg")
+            seen.add(key)
+        return image_names
+
+
+    def _save_photo_info(self, file_path, photo_info_json):
+
+        """
+        Сохранение информации о загруженных фотографиях в JSON-файл.
+        JSON записывается без отступов одной операцией записи,
+        при наличии orjson используется он.
+
+        Args:
+            file_path: Путь к JSON-файлу.
+
+            photo_info_json: Список словарей вида {'file_name': ..., 'size': ...}.
+        """
+
+        if orjson is not None:
+            data = orjson.dumps(photo_info_json)
+        else:
+            data = json.dumps(photo_info_json, separators=(',', ':')).encode()
+        with open(file_path, 'wb', buffering=1 << 20) as json_file:
+            json_file.write(data)
+
+
+    def backup_photos(self, user_id, count_photos=5, album_id='profile', targets=('ya', 'gdrive')):
+
+        """
+        Резервное копирование фотографий сразу в несколько хранилищ.
+        Фотографии запрашиваются у VK один раз и передаются всем хранилищам.
+
+        Args:
+            user_id: ID пользователя VK.
+
+            count_photos: Количество фотографий, по умолчанию 5.
+
+            album_id: Идентификатор альбома в VK (по умолчанию 'profile'): 
+                'wall' — фотографии со стены;
+                'profile' — фотографии профиля.
+
+            targets: Хранилища для сохранения:
+                'ya' — Яндекс.Диск;
+                'gdrive' — Google Диск.
+        """
+
+        photos = self.get_profile_photos(user_id, count_photos, album_id)
+        if 'ya' in targets:
+            self.save_photos_to_yandex_disk(user_id, count_photos, album_id, photos=photos)
+        if 'gdrive' in targets:
+            self.save_photos_to_google_drive(user_id, count_photos, album_id, photos=photos)
+
+
+    def save_photos_to_yandex_disk(self, album_id_vk, count_photos=5, album_id='profile', photos=None):
 
         """
         Сохранение фотографий c VK профиля пользователя на Яндекс.Диск.
@@ -177,39 +449,95 @@ class VkApiClient:
             album_id: Идентификатор альбома в VK (по умолчанию 'profile'): 
                 'wall' — фотографии со стены;
                 'profile' — фотографии профиля.
+
+            photos: Уже полученный список фотографий из get_profile_photos.
+                Если не передан, фотографии запрашиваются у VK.
         """
 
-        photos = self.get_profile_photos(album_id_vk, count_photos, album_id)
+        if photos is None:
+            photos = self.get_profile_photos(album_id_vk, count_photos, album_id)
         headers = {'Authorization': f'OAuth {TOKEN_YA_DISK}'}
         folder_path = 'backup_photos'
-        photo_info_json = []
-        response = requests.get('https://cloud-api.yandex.net/v1/disk/resources',
-                                headers=headers,
-                                params={'path': folder_path})
-        if response.status_code == 404:
-            response = requests.put('https://cloud-api.yandex.net/v1/disk/resources',
+        # Сразу создаем папку: 201 - создана, 409 - уже существует
+        response = self.session.put('https://cloud-api.yandex.net/v1/disk/resources',
                                     headers=headers,
                                     params={'path': folder_path})
-        likes_counts = [photo[0] for photo in photos]
-        for index, (likes, date, photo_url) in enumerate(tqdm(photos, desc="Загрузка фотографи на Яндекс.Диск", total=count_photos)):
-            url = 'https://cloud-api.yandex.net/v1/disk/resources/upload'
-            image_name = f"{likes}_likes.jpg"
-            if likes_counts.count(likes) != 1:
-                date = datetime.fromtimestamp(
-                    date).strftime('%Y-%m-%d_%H-%M-%S')
-                image_name = f"{likes}_likes__{date}.jpg"
-            params = {'path': f'{folder_path}/{image_name}',
-                      'url': photo_url,
-                      'disable_redirects': 'true'}
-            response = requests.post(url, headers=headers, params=params)
-            photo_info_json.append(
-                {'file_name': image_name, 'size': self.photo_type})
-            # print(f"Загрузка фотографии № {index+1} из {count_photos} на Яндекс.Диск: {image_name}")
-        with open('photo_info_ya_disk.json', 'w') as json_file:
-            json.dump(photo_info_json, json_file, indent=4)
-
-
-    def save_photos_to_google_drive(self, album_id_vk, count_photos=5, album_id='profile'):
+        if response.status_code not in (201, 409):
+            response.raise_for_status()
+        image_names = self._make_image_names(photos)
+        uploads = [(photo_url, image_name)
+                   for (_, _, photo_url, _), image_name in zip(photos, image_names)]
+        statuses = asyncio.run(self._upload_photos_to_yandex_disk(folder_path, headers, uploads))
+        # 202 - Яндекс.Диск принял фото к загрузке, остальные фото в отчет не попадают
+        photo_info_json = [{'file_name': image_name, 'size': self.photo_type}
+                           for (_, image_name), status in zip(uploads, statuses)
+                           if status == 202]
+        self._save_photo_info('photo_info_ya_disk.json', photo_info_json)
+
+
+    async def _upload_one_ya(self, session, sem, pbar, folder_path, headers, photo_url, image_name):
+
+        """
+        Загрузка одной фотографии на Яндекс.Диск по URL.
+
+        Args:
+            session: Сессия aiohttp.ClientSession.
+
+            sem: Семафор, ограничивающий число одновременных загрузок.
+
+            pbar: Общий индикатор прогресса tqdm.
+
+            folder_path: Путь к папке на Яндекс.Диске.
+
+            headers: Заголовки запроса с токеном Яндекс.Диска.
+
+            photo_url: URL-адрес фотографии в VK.
+
+            image_name: Имя файла на Яндекс.Диске.
+
+        Returns:
+            HTTP-статус ответа Яндекс.Диска (202 - загрузка принята).
+        """
+
+        params = {'path': f'{folder_path}/{image_name}',
+                  'url': photo_url,
+                  'disable_redirects': 'true'}
+        async with sem:
+            async with session.post('https://cloud-api.yandex.net/v1/disk/resources/upload',
+                                    headers=headers,
+                                    params=params) as response:
+                pbar.update(1)
+                return response.status
+
+
+    async def _upload_photos_to_yandex_disk(self, folder_path, headers, uploads, max_workers=8):
+
+        """
+        Параллельная загрузка фотографий на Яндекс.Диск.
+
+        Args:
+            folder_path: Путь к папке на Яндекс.Диске.
+
+            headers: Заголовки запроса с токеном Яндекс.Диска.
+
+            uploads: Список кортежей вида (url, image_name).
+
+            max_workers: Максимальное число одновременных загрузок, по умолчанию 8.
+
+        Returns:
+            Список HTTP-статусов в том же порядке, что и uploads.
+        """
+
+        sem = asyncio.Semaphore(max_workers)
+        connector = aiohttp.TCPConnector(limit=max_workers, limit_per_host=max_workers)
+        with tqdm(total=len(uploads), desc="Загрузка фотографи на Яндекс.Диск") as pbar:
+            async with aiohttp.ClientSession(connector=connector) as session:
+                tasks = [self._upload_one_ya(session, sem, pbar, folder_path, headers, photo_url, image_name)
+                         for photo_url, image_name in uploads]
+                return await asyncio.gather(*tasks)
+
+
+    def save_photos_to_google_drive(self, album_id_vk, count_photos=5, album_id='profile', photos=None):
 
         """
         Сохранение фотографий c VK профиля пользователя на Google Диск.
@@ -222,9 +550,18 @@ class VkApiClient:
             album_id: Идентификатор альбома в VK (по умолчанию 'profile'): 
                 'wall' — фотографии со стены;
                 'profile' — фотографии профиля.
+
+            photos: Уже полученный список фотографий из get_profile_photos.
+                Если не передан, фотографии запрашиваются у VK.
         """
 
-        photos = self.get_profile_photos(album_id_vk, count_photos, album_id)
+        if photos is None:
+            photos = self.get_profile_photos(album_id_vk, count_photos, album_id)
+        # Библиотеки Google тяжелые, поэтому импортируются только при работе с Google Диском
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from googleapiclient.discovery import build
+
         SCOPES = ["https://www.googleapis.com/auth/drive"]
         creds = None
 
@@ -257,42 +594,154 @@ class VkApiClient:
             folder = service.files().create(body=folder_metadata, fields="id").execute()
             folder_id = folder.get("id")
 
-        photo_info_json = []
-        likes_counts = [photo[0] for photo in photos]
-        for index, (likes, date, photo_url) in enumerate(tqdm(photos, 
-                                                              desc="Загрузка фотографи на Google Диск", 
-                                                              total=count_photos)):
-            image_name = f"{likes}_likes.jpg"
-            if likes_counts.count(likes) > 1:
-                date = datetime.fromtimestamp(date).strftime('%Y-%m-%d_%H-%M-%S')
-                image_name = f"{likes}_likes__{date}.jpg"
-            file_metadata = {
-                "name": image_name,
-                "parents": [folder_id],
-                "mimeType": "image/jpeg"
-            }
-            response = requests.get(photo_url)
-            media = MediaInMemoryUpload(response.content, 
-                                        resumable=True, 
-                                        mimetype='image/jpeg')
-            
-            created_file = service.files().create(body=file_metadata,
-                                          media_body=media,
-                                          fields="id").execute()
-            
-            # Очищаем переменную, чтобы не было утечки памяти
-            media = None
+        # Файлы, которые уже есть в папке, получаем одним постраничным запросом.
+        # Загруженные фото узнаем по ID фото VK из appProperties, а не по имени:
+        # имя зависит от порядка фотографий и может достаться другому фото
+        existing_names = set()
+        names_by_photo_id = {}
+        untagged_names = set()
+        page_token = None
+        while True:
+            response = service.files().list(q=f"'{folder_id}' in parents and trashed=false",
+                                            fields="nextPageToken, files(name, appProperties)",
+                                            pageToken=page_token,
+                                            pageSize=1000).execute()
+            for file in response.get('files', []):
+                existing_names.add(file['name'])
+                vk_photo_id = file.get('appProperties', {}).get('vk_photo_id')
+                if vk_photo_id is not None:
+                    names_by_photo_id[vk_photo_id] = file['name']
+                else:
+                    untagged_names.add(file['name'])
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+
+        # Файлы прежних запусков не имеют vk_photo_id, их сопоставляем по имени,
+        # которое фото получило бы при прежнем способе именования
+        file_names = {}
+        new_photos = []
+        for photo, legacy_name in zip(photos, self._make_image_names(photos)):
+            photo_id = photo[3]
+            if photo_id in names_by_photo_id:
+                file_names[photo_id] = names_by_photo_id[photo_id]
+            elif legacy_name in untagged_names:
+                file_names[photo_id] = legacy_name
+            else:
+                new_photos.append(photo)
+
+        image_names = self._make_image_names(new_photos, existing_names)
+        uploads = [(photo_url, photo_id, image_name)
+                   for (_, _, photo_url, photo_id), image_name in zip(new_photos, image_names)]
+        file_names.update((photo_id, image_name) for _, photo_id, image_name in uploads)
+        photo_info_json = [{'file_name': file_names[photo[3]], 'size': self.photo_type}
+                           for photo in photos]
+
+        # httplib2 не потокобезопасен, поэтому у каждого потока свой http-клиент
+        thread_local = threading.local()
+        # При наличии httpx загрузки мультиплексируются в HTTP/2-соединении
+        http2_client = HttpxTransport.create_client(max_connections=8)
+
+        try:
+            with tqdm(total=len(uploads), desc="Загрузка фотографи на Google Диск") as pbar:
+
+                def upload(job):
+                    photo_url, photo_id, image_name = job
+                    file_id = self._upload_one_gdrive(service, creds, thread_local, folder_id,
+                                                      photo_url, photo_id, image_name, http2_client)
+                    pbar.update(1)
+                    return file_id
+
+                with ThreadPoolExecutor(max_workers=8) as executor:
+                    list(executor.map(upload, uploads))
+        finally:
+            if http2_client is not None:
+                http2_client.close()
+        self._save_photo_info('photo_info_g_drive.json', photo_info_json)
+
+
+    def _upload_one_gdrive(self, service, creds, thread_local, folder_id, photo_url, photo_id, image_name,
+                           http2_client=None):
+
+        """
+        Загрузка одной фотографии из VK на Google Диск.
+
+        Args:
+            service: Объект сервиса Google Drive API.
+
+            creds: Учетные данные Google.
+
+            thread_local: Хранилище http-клиентов для каждого потока.
 
-            photo_info_json.append({'file_name': image_name, 'size': self.photo_type})
-            # print(f"Загрузка фотографии № {index+1} из {count_photos} на Google Диск: {image_name}")
-        with open('photo_info_g_drive.json', 'w') as json_file:
-            json.dump(photo_info_json, json_file, indent=4)
+            folder_id: Идентификатор папки на Google Диске.
+
+            photo_url: URL-адрес фотографии в VK.
+
+            photo_id: Идентификатор фотографии VK, сохраняется в appProperties.
+
+            image_name: Имя файла на Google Диске.
+
+            http2_client: Общий клиент httpx с HTTP/2. Если не передан,
+                поток использует собственный клиент httplib2 из build_http.
+
+        Returns:
+            Идентификатор созданного файла.
+        """
+
+        from google_auth_httplib2 import AuthorizedHttp
+        from googleapiclient.http import MediaInMemoryUpload, build_http
+        from gdrive_media import StreamingMediaUpload, read_stream
+
+        if not hasattr(thread_local, 'http'):
+            if http2_client is not None:
+                transport = HttpxTransport(http2_client)
+            else:
+                # build_http задает таймаут и не считает ответ 308 resumable-загрузки редиректом
+                transport = build_http()
+            thread_local.http = AuthorizedHttp(creds, http=transport)
+        file_metadata = {
+            "name": image_name,
+            "parents": [folder_id],
+            "mimeType": "image/jpeg",
+            "appProperties": {"vk_photo_id": photo_id}
+        }
+        with self.session.get(photo_url, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            content_length = response.headers.get('Content-Length')
+            if content_length is not None:
+                head = b''
+                small = int(content_length) <= self.RESUMABLE_UPLOAD_THRESHOLD
+            else:
+                # Размер неизвестен: читаем не больше порога, чтобы понять,
+                # помещается ли фото в один multipart-запрос
+                head = read_stream(response.raw, self.RESUMABLE_UPLOAD_THRESHOLD + 1)
+                small = len(head) <= self.RESUMABLE_UPLOAD_THRESHOLD
+            if small:
+                # Небольшие фото загружаются одним multipart-запросом
+                media = MediaInMemoryUpload(head if content_length is None else response.content,
+                                            mimetype='image/jpeg',
+                                            resumable=False)
+            else:
+                # Большие фото передаются resumable-загрузкой прямо из ответа VK:
+                # скачивание и загрузка идут одновременно, в памяти один фрагмент.
+                # Content-Length задает размер, только если тело не сжато
+                size = None
+                if content_length is not None and 'Content-Encoding' not in response.headers:
+                    size = int(content_length)
+                media = StreamingMediaUpload(response.raw,
+                                             mimetype='image/jpeg',
+                                             chunksize=self.UPLOAD_CHUNK_SIZE,
+                                             size=size,
+                                             prefix=head)
+            created_file = service.files().create(body=file_metadata,
+                                                  media_body=media,
+                                                  fields="id").execute(http=thread_local.http)
+        return created_file.get("id")
 
 
 with open('api.txt', 'r') as token:
-    TOKEN_VK = token.readline()
-    USER_ID = token.readline()
-    TOKEN_YA_DISK = token.readline()
+    TOKEN_VK, USER_ID, TOKEN_YA_DISK = (line.strip() for line in token.read().splitlines()[:3])
 
 if __name__ == '__main__':
     vk_client = VkApiClient(TOKEN_VK)
@@ -302,7 +751,7 @@ if __name__ == '__main__':
     # vk_client.replase_status(USER_ID, 'Изучаю', 'Учу')
     # print(vk_client.get_status(USER_ID))
 
-    # pprint(vk_client.get_profile_photos(USER_ID))
+    # print(vk_client.get_profile_photos(USER_ID))
     vk_client.save_photos_to_yandex_disk(USER_ID, 5)
     vk_client.save_photos_to_google_drive(USER_ID, 10, 'wall')
 